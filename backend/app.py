@@ -3,25 +3,77 @@ Flask backend for Hamstring Injury Risk Predictor
 Main application entry point
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from config import Config
 from utils.biomarker_processor import (
     validate_biomarker_data,
     prepare_model_features
 )
-from utils.model_loader import predict_injury_risk
+from utils.model_loader import get_model, predict_injury_risk
+from utils.json_provider import OrjsonProvider
 from utils.recommendation_generator import (
     generate_recommendations,
-    get_key_indicators_text
+    get_key_indicators_text,
+    get_risk_level
 )
-import traceback
+from utils.metabolite_database import METABOLITE_DATABASE
+from utils.confidence_numba import calculate_confidence_batch
+import atexit
+import functools
+import hashlib
+import logging
+import logging.handlers
+import queue
+
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Send log records through a queue so formatting and stream I/O happen
+    on a background listener thread instead of the request thread.
+    Safe to call more than once (e.g. one app per test).
+    """
+    root = logging.getLogger()
+    root.setLevel(level)
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return
+    
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
 
 
 def create_app(config_class=Config):
     """Application factory"""
     app = Flask(__name__)
     app.config.from_object(config_class)
+    configure_logging(logging.DEBUG if app.config['DEBUG'] else logging.INFO)
+    
+    # Serialize responses with orjson (jsonify routes through app.json)
+    app.json = OrjsonProvider(app)
+    # Flask 2.3+ no longer reads these config keys itself
+    app.json.sort_keys = app.config['JSON_SORT_KEYS']
+    app.json.compact = not app.config['JSONIFY_PRETTYPRINT_REGULAR']
+    
+    # The metabolite database is static - serialize it once at startup
+    metabolites_blob = app.json.dumps_bytes(METABOLITE_DATABASE)
+    metabolites_etag = hashlib.sha1(metabolites_blob).hexdigest()
+    metabolites_cache_headers = {
+        'Cache-Control': 'public, max-age=3600',
+        'ETag': f'"{metabolites_etag}"'
+    }
+    metabolites_headers = {
+        **metabolites_cache_headers,
+        'Content-Length': str(len(metabolites_blob))
+    }
     
     # Enable CORS
     CORS(app, resources={
@@ -32,6 +84,72 @@ def create_app(config_class=Config):
         }
     })
     
+    def unsupported_media_type():
+        """
+        415 response for bodies not sent as application/json (the
+        Content-Type check request.get_json() used to do)
+        """
+        return jsonify({
+            'error': 'Unsupported media type',
+            'message': 'Request body must be JSON (Content-Type: application/json)'
+        }), 415
+    
+    def read_json_body():
+        """
+        Parse the request body with orjson, bypassing request.get_json()
+        (stdlib decoder + per-request cache). Returns None if the body is
+        empty or not valid JSON.
+        """
+        try:
+            return app.json.loads(request.get_data(cache=False))
+        except ValueError:
+            return None
+    
+    @functools.lru_cache(maxsize=app.config['PREDICTION_CACHE_SIZE'])
+    def compute_prediction(payload_key):
+        """
+        Run feature preparation, inference and recommendation generation
+        for a validated payload. Keyed on the payload serialized with sorted
+        keys so repeated submissions skip the ODE solve entirely.
+        
+        Returns the serialized response body (bytes).
+        Raises ValueError if feature preparation fails.
+        """
+        data = app.json.loads(payload_key)
+        
+        # Prepare features for model
+        model_features, metadata = prepare_model_features(data)
+        
+        # Make prediction
+        # Pass metadata to model for better mock predictions
+        # (prepare_model_features returns a fresh dict, safe to extend in place)
+        model_features['metadata'] = metadata
+        risk_score = predict_injury_risk(model_features)
+        risk_score = round(risk_score, 1)
+        
+        # Determine risk level
+        risk_level = get_risk_level(risk_score)
+        
+        # Generate recommendations
+        recommendations = generate_recommendations(risk_score, metadata)
+        
+        # Generate key indicators text
+        key_indicators = get_key_indicators_text(metadata)
+        
+        # Calculate confidence (mock for now - can be improved with model uncertainty)
+        confidence = calculate_confidence(metadata, risk_score)
+        
+        # Prepare response
+        response = {
+            'riskScore': int(risk_score),
+            'riskLevel': risk_level,
+            'confidence': confidence,
+            'keyIndicators': key_indicators,
+            'recommendations': recommendations
+        }
+        
+        return app.json.dumps_bytes(response)
+    
     @app.route('/api/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
@@ -79,8 +197,11 @@ def create_app(config_class=Config):
         }
         """
         try:
+            if not request.is_json:
+                return unsupported_media_type()
+            
             # Get request data
-            data = request.get_json()
+            data = read_json_body()
             
             if not data:
                 return jsonify({
@@ -88,6 +209,13 @@ def create_app(config_class=Config):
                     'message': 'Request body must contain biomarker data'
                 }), 400
             
+            # Cheap reject for payloads without any tissue section before the full walk
+            if isinstance(data, dict) and _KNOWN_TISSUES.isdisjoint(data):
+                return jsonify({
+                    'error': 'No recognized tissue keys',
+                    'message': 'Request body must contain saliva, sweat or urine data'
+                }), 400
+            
             # Validate biomarker data
             is_valid, errors = validate_biomarker_data(data)
             
@@ -97,55 +225,20 @@ def create_app(config_class=Config):
                     'details': errors
                 }), 400
             
-            # Prepare features for model
+            # Run the prediction pipeline (cached on the canonical payload)
+            payload_key = app.json.dumps_bytes(data, sort_keys=True)
             try:
-                model_features, metadata = prepare_model_features(data)
+                body = compute_prediction(payload_key)
             except ValueError as e:
                 return jsonify({
                     'error': 'Feature preparation failed',
                     'message': str(e)
                 }), 400
             
-            # Make prediction
-            # Pass metadata to model for better mock predictions
-            model_features_with_metadata = {**model_features, 'metadata': metadata}
-            risk_score = predict_injury_risk(model_features_with_metadata)
-            risk_score = round(risk_score, 1)
-            
-            # Determine risk level
-            if risk_score < 25:
-                risk_level = 'LOW'
-            elif risk_score < 50:
-                risk_level = 'MODERATE'
-            elif risk_score < 75:
-                risk_level = 'HIGH'
-            else:
-                risk_level = 'CRITICAL'
-            
-            # Generate recommendations
-            recommendations = generate_recommendations(risk_score, metadata)
-            
-            # Generate key indicators text
-            key_indicators = get_key_indicators_text(metadata)
-            
-            # Calculate confidence (mock for now - can be improved with model uncertainty)
-            confidence = calculate_confidence(metadata, risk_score)
-            
-            # Prepare response
-            response = {
-                'riskScore': int(risk_score),
-                'riskLevel': risk_level,
-                'confidence': confidence,
-                'keyIndicators': key_indicators,
-                'recommendations': recommendations
-            }
-            
-            return jsonify(response), 200
+            return Response(body, status=200, mimetype='application/json')
             
         except Exception as e:
-            # Log error
-            print(f"Error in prediction endpoint: {e}")
-            print(traceback.format_exc())
+            logger.exception("Error in prediction endpoint")
             
             return jsonify({
                 'error': 'Internal server error',
@@ -156,14 +249,23 @@ def create_app(config_class=Config):
     @app.route('/api/metabolites', methods=['GET'])
     def get_metabolites():
         """Get available metabolites and their info"""
-        from utils.metabolite_database import METABOLITE_DATABASE
-        return jsonify(METABOLITE_DATABASE)
+        if request.if_none_match.contains(metabolites_etag):
+            return Response(status=304, headers=metabolites_cache_headers)
+        return Response(
+            metabolites_blob,
+            status=200,
+            mimetype='application/json',
+            headers=metabolites_headers
+        )
     
     @app.route('/api/email-results', methods=['POST'])
     def email_results():
         """Send assessment results via email"""
         try:
-            data = request.get_json()
+            if not request.is_json:
+                return unsupported_media_type()
+            
+            data = read_json_body()
             
             if not data:
                 return jsonify({
@@ -182,10 +284,11 @@ def create_app(config_class=Config):
                 }), 400
             
             # Import email utility
-            from utils.email_sender import send_results_email
+            from utils.email_sender import (
+                email_configured, send_results_email, send_results_email_async
+            )
             
-            # Send email
-            success = send_results_email(
+            email_args = dict(
                 to_email=email,
                 recipient_name=recipient_name,
                 risk_score=results['riskScore'],
@@ -195,20 +298,25 @@ def create_app(config_class=Config):
                 recommendations=results['recommendations']
             )
             
-            if success:
-                return jsonify({
-                    'status': 'success',
-                    'message': f'Email sent successfully to {email}'
-                }), 200
-            else:
+            if not email_configured():
+                # No credentials: runs inline only to print setup help (no network I/O)
+                send_results_email(**email_args)
                 return jsonify({
                     'error': 'Email sending failed',
                     'message': 'Unable to send email. Please check configuration.'
                 }), 500
+            
+            # Send email in the background; the SMTP/SendGrid round-trips
+            # no longer hold up this request (failures are logged)
+            send_results_email_async(**email_args)
+            
+            return jsonify({
+                'status': 'queued',
+                'message': f'Email to {email} has been queued for sending'
+            }), 202
                 
         except Exception as e:
-            print(f"Error in email endpoint: {e}")
-            print(traceback.format_exc())
+            logger.exception("Error in email endpoint")
             
             return jsonify({
                 'error': 'Internal server error',
@@ -230,42 +338,32 @@ def create_app(config_class=Config):
             'message': 'An unexpected error occurred'
         }), 500
     
+    # Load and warm up the model now so the first request doesn't pay for it
+    if app.config['WARMUP']:
+        try:
+            get_model().warmup()
+        except Exception:
+            logger.exception("Model warmup failed")
+        # Compile (or load from cache) the Numba confidence kernel
+        calculate_confidence({}, 50.0)
+    
     return app
 
 
+# Top-level payload keys accepted by /api/predict
+_KNOWN_TISSUES = frozenset({'saliva', 'sweat', 'urine'})
+
 def calculate_confidence(metadata, risk_score):
     """
     Calculate confidence score based on data quality and model certainty.
     Returns confidence percentage (0-100)
-    """
-    # Base confidence
-    confidence = 70
-    
-    # Boost confidence if primary tissue is sweat (most relevant)
-    if metadata.get('primary_tissue') == 'sweat':
-        confidence += 10
-    elif metadata.get('primary_tissue') == 'urine':
-        confidence += 5
-    
-    # Boost confidence if primary biomarker is lactate (most important)
-    if metadata.get('primary_biomarker') == 'lactate':
-        confidence += 10
-    
-    # Boost if multiple tissues have data
-    tissue_scores = metadata.get('tissue_scores', {})
-    if len(tissue_scores) >= 2:
-        confidence += 5
-    if len(tissue_scores) >= 3:
-        confidence += 2
     
-    # Reduce confidence for extreme risk scores (less certain)
-    if risk_score < 10 or risk_score > 90:
-        confidence -= 5
-    
-    # Cap confidence
-    confidence = max(60, min(95, confidence))
-    
-    return confidence
+    Base 70, plus tissue/biomarker bonuses, +5/+2 when 2/3 tissues have
+    data, -5 for extreme risk scores (less certain), capped to 60-95.
+    A batch of one through utils.confidence_numba, so single and batched
+    scoring share one kernel.
+    """
+    return calculate_confidence_batch([metadata], [risk_score])[0]
 
 
 if __name__ == '__main__':
@@ -281,10 +379,16 @@ if __name__ == '__main__':
     print("   - POST /api/email-results")
     print()
     
-    # Disable reloader when using PyTorch (prevents Windows DLL conflicts)
-    app.run(
-        host='0.0.0.0',
-        port=5001,
-        debug=app.config['DEBUG'],
-        use_reloader=False  # Fixes PyTorch + Flask reloader conflict on Windows
-    )
+    if app.config['DEBUG']:
+        # Werkzeug dev server: single process, for local development only
+        # Disable reloader when using PyTorch (prevents Windows DLL conflicts)
+        app.run(
+            host='0.0.0.0',
+            port=app.config['PORT'],
+            debug=True,
+            use_reloader=False  # Fixes PyTorch + Flask reloader conflict on Windows
+        )
+    else:
+        from waitress import serve
+        print(f"   Serving with waitress ({app.config['SERVER_THREADS']} threads)")
+        serve(app, host='0.0.0.0', port=app.config['PORT'], threads=app.config['SERVER_THREADS'])
@@ -16,10 +16,55 @@ class Config:
     # Model settings
     MODEL_PATH = os.getenv('MODEL_PATH', 'models/gnode_model.pth')  # Fixed: .pth not .pt
     MODEL_TYPE = 'GNODE'
+    WARMUP = os.getenv('WARMUP', '1') == '1'  # Load + run the model once at startup
+    
+    # ODE solver: 'rk4' with step 0.1 is what the model was trained with.
+    # Adaptive solvers (e.g. 'dopri5', needs torchdiffeq) use the tolerances;
+    # larger RK4 steps trade accuracy for fewer GCN evaluations
+    MODEL_ODE_METHOD = os.getenv('MODEL_ODE_METHOD', 'rk4')
+    MODEL_ODE_STEP_SIZE = float(os.getenv('MODEL_ODE_STEP_SIZE', 0.1))
+    MODEL_ODE_ATOL = float(os.getenv('MODEL_ODE_ATOL', 1e-3))
+    MODEL_ODE_RTOL = float(os.getenv('MODEL_ODE_RTOL', 1e-3))
+    
+    # Inference precision: 'fp32', 'int8' (dynamic quantization, CPU only),
+    # 'bf16' (bfloat16 weights) or 'fp16' (float16 weights, GPU only). All cut
+    # weight memory traffic but are not exact: measured against fp32, int8 and
+    # bf16 scores move by up to ~2-3 risk points, and inputs near the model's
+    # decision boundary can move further. int8 requests are
+    # scored one at a time (batched int8 scores depend on the rest of the batch).
+    # Keep 'fp32' where scores must match exactly
+    MODEL_PRECISION = os.getenv('MODEL_PRECISION', 'fp32').lower()
+    
+    # On GPU, torch.compile the model (Inductor, mode='reduce-overhead') instead
+    # of TorchScript. Off by default: needs Triton and compiles for a while at startup
+    MODEL_COMPILE = os.getenv('MODEL_COMPILE', '0') == '1'
+    
+    # Replay single-sample inference from a captured CUDA graph (GPU + 'rk4' only;
+    # not used with MODEL_COMPILE, which records its own). Off by default until
+    # it has been validated on GPU hardware; set to '1' to opt in
+    MODEL_CUDA_GRAPH = os.getenv('MODEL_CUDA_GRAPH', '0') == '1'
+    
+    # Number of distinct model inputs whose risk scores are cached (0 disables)
+    MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', 1024))
     
     # API settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
     JSON_SORT_KEYS = False
+    JSONIFY_PRETTYPRINT_REGULAR = False  # Never indent responses, even with DEBUG on
+    
+    # Server settings (production WSGI server, see server.py)
+    PORT = int(os.getenv('PORT', 5001))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 8))
+    
+    # Number of distinct /api/predict payloads to keep cached (0 disables)
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 4096))
+    
+    # Inference batching: concurrent /api/predict calls are coalesced into
+    # one forward pass of up to PREDICT_MAX_BATCH samples, waiting at most
+    # PREDICT_BATCH_WAIT_MS for a batch to fill
+    PREDICT_MAX_BATCH = int(os.getenv('PREDICT_MAX_BATCH', 16))
+    PREDICT_BATCH_WAIT_MS = float(os.getenv('PREDICT_BATCH_WAIT_MS', 5))
+    PREDICT_TIMEOUT = float(os.getenv('PREDICT_TIMEOUT', 30))  # seconds
     
     # Biomarker settings
     REQUIRED_FEATURES = ['mw', 'tissue_sweat', 'tissue_urine', 'rms_feat', 
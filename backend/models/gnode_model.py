@@ -6,31 +6,175 @@ This model uses Graph Convolutional Networks combined with Neural ODEs
 to model continuous dynamics of biomarker interactions over time.
 """
 
+import importlib.util
+import math
+from typing import List
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from torch_geometric.nn import GCNConv
 
+# torch_geometric and torchdiffeq are imported where they are used: the
+# former only while building the adjacency, the latter only for non-'rk4'
+# solvers, and importing them adds seconds to startup
+TORCHDIFFEQ_AVAILABLE = importlib.util.find_spec('torchdiffeq') is not None
+if not TORCHDIFFEQ_AVAILABLE:
+    print("⚠️ torchdiffeq not installed - only the built-in 'rk4' solver is available")
+
+
+# torchdiffeq solvers that integrate on a fixed grid (take step_size);
+# all others are adaptive and take atol/rtol
+FIXED_GRID_METHODS = ('euler', 'midpoint', 'heun2', 'heun3', 'rk4',
+                      'explicit_adams', 'implicit_adams', 'fixed_adams')
+
+# Graphs up to this many nodes use a dense adjacency (faster than sparse for tiny graphs)
+DENSE_ADJACENCY_MAX_NODES = 256
+
+
+def normalized_adjacency(edge_index, num_nodes=None):
+    """
+    Build the GCN propagation matrix A_hat = D^-1/2 (A + I) D^-1/2.
+    
+    Same normalization GCNConv applies on every call (gcn_norm), computed
+    once: rows are target nodes, columns are source nodes.
+    
+    Args:
+        edge_index (torch.Tensor): Graph edge connectivity [2, num_edges]
+        num_nodes (int): Number of nodes (defaults to max index + 1)
+        
+    Returns:
+        A_hat [num_nodes, num_nodes] as a dense tensor for small graphs,
+        sparse CSR (int32 indices) otherwise
+    """
+    from torch_geometric.utils import add_remaining_self_loops
+    
+    if num_nodes is None:
+        num_nodes = int(edge_index.max()) + 1 if edge_index.numel() else 0
+    
+    edge_index = edge_index.long()
+    edge_weight = torch.ones(edge_index.size(1), device=edge_index.device)
+    edge_index, edge_weight = add_remaining_self_loops(
+        edge_index, edge_weight, fill_value=1.0, num_nodes=num_nodes
+    )
+    row, col = edge_index
+    
+    deg = torch.zeros(num_nodes, dtype=edge_weight.dtype, device=edge_weight.device)
+    deg.scatter_add_(0, col, edge_weight)
+    deg_inv_sqrt = deg.pow(-0.5)
+    deg_inv_sqrt[deg_inv_sqrt == float('inf')] = 0
+    norm = deg_inv_sqrt[row] * edge_weight * deg_inv_sqrt[col]
+    
+    adj = torch.sparse_coo_tensor(
+        torch.stack([col, row]), norm, (num_nodes, num_nodes), check_invariants=True
+    ).coalesce()
+    
+    if num_nodes <= DENSE_ADJACENCY_MAX_NODES:
+        return adj.to_dense()
+    adj = adj.to_sparse_csr()
+    return torch.sparse_csr_tensor(
+        adj.crow_indices().to(torch.int32),
+        adj.col_indices().to(torch.int32),
+        adj.values(),
+        adj.size(),
+        check_invariants=True
+    )
+
+
+def propagate(adj, x):
+    """
+    Apply the propagation matrix to node features.
+    
+    x may stack several independent copies of the graph along the node
+    dimension ([copies * num_nodes, channels]); each copy is propagated
+    separately, which is how a batch of samples is run in one forward pass.
+    """
+    num_nodes = adj.size(0)
+    if x.size(0) == num_nodes:
+        return adj @ x
+    copies = x.size(0) // num_nodes
+    x = x.view(copies, num_nodes, -1).transpose(0, 1).reshape(num_nodes, -1)
+    out = adj @ x
+    return out.view(num_nodes, copies, -1).transpose(0, 1).reshape(copies * num_nodes, -1)
+
+
+def _gcn_ode_step(x, adj, w1, b1, w2, b2):
+    """gc2(relu(gc1(x))) on raw GraphConv weights"""
+    x = F.relu(propagate(adj, x @ w1.t()) + b1)
+    return propagate(adj, x @ w2.t()) + b2
+
+
+# TorchScript-compiled once at import: both convolutions and the ReLU run as
+# one graph instead of three module calls per ODE function evaluation
 try:
-    from torchdiffeq import odeint
-    TORCHDIFFEQ_AVAILABLE = True
-except ImportError:
-    TORCHDIFFEQ_AVAILABLE = False
-    print("⚠️ torchdiffeq not installed. Install with: pip install torchdiffeq")
+    fused_gcn_ode_step = torch.jit.script(_gcn_ode_step)
+except Exception as e:
+    print(f"⚠️ TorchScript unavailable ({e}) - using eager GCN step")
+    fused_gcn_ode_step = _gcn_ode_step
+
+
+# Graph tensors shared by every ODEFunc built on the same edges and device,
+# so model replicas (validation, ensembles) don't each hold and recompute them:
+# (device, edges) -> (int32 edge_index, normalized adjacency)
+_GRAPH_CACHE = {}
+
+
+def shared_graph(edge_index):
+    """
+    Return the cached (int32 edge_index, normalized adjacency) pair for
+    these edges, building it on first use. Keyed on the edge values rather
+    than the tensor object, so equal graphs share storage.
+    """
+    # int32 indices: half the memory traffic of int64, graphs are tiny
+    edge_index = edge_index.to(torch.int32).contiguous()
+    key = (str(edge_index.device), tuple(edge_index.shape), tuple(edge_index.flatten().tolist()))
+    graph = _GRAPH_CACHE.get(key)
+    if graph is None:
+        graph = _GRAPH_CACHE.setdefault(key, (edge_index, normalized_adjacency(edge_index)))
+    return graph
+
+
+class GraphConv(nn.Module):
+    """
+    Graph convolution over a precomputed normalized adjacency.
+    
+    Computes A_hat @ (x W^T) + b. Parameter layout (lin.weight, bias)
+    matches GCNConv, so existing checkpoints load unchanged.
+    """
+    def __init__(self, in_channels, out_channels):
+        super(GraphConv, self).__init__()
+        self.lin = nn.Linear(in_channels, out_channels, bias=False)
+        self.bias = nn.Parameter(torch.zeros(out_channels))
+        nn.init.xavier_uniform_(self.lin.weight)  # glorot, as GCNConv
+
+    def forward(self, x, adj):
+        return propagate(adj, self.lin(x)) + self.bias
 
 
 class ODEFunc(nn.Module):
     """
     ODE function component for GNODE model.
     Defines the derivative function for the Neural ODE.
+    
+    The graph is fixed at construction, so its normalized adjacency is
+    computed once (and shared with other instances on the same graph, see
+    shared_graph) instead of inside every convolution call.
     """
+    # Final, so TorchScript treats it as a constant and prunes the unused
+    # branch (the fused one can't compile against quantized layers)
+    fused: torch.jit.Final[bool]
+
     def __init__(self, in_channels, hidden_channels, edge_index):
         super(ODEFunc, self).__init__()
-        self.edge_index = edge_index
-        self.gc1 = GCNConv(in_channels, hidden_channels)
-        self.gc2 = GCNConv(hidden_channels, hidden_channels)
+        edge_index, adj = shared_graph(edge_index)
+        self.register_buffer('edge_index', edge_index, persistent=False)
+        self.register_buffer('adj', adj, persistent=False)
+        self.gc1 = GraphConv(in_channels, hidden_channels)
+        self.gc2 = GraphConv(hidden_channels, hidden_channels)
+        
+        # Use the fused step; quantized layers (no float weights) need the module path
+        self.fused = True
 
-    def forward(self, t, x):
+    def forward(self, t: float, x):
         """
         Forward pass for ODE function.
         
@@ -41,12 +185,19 @@ class ODEFunc(nn.Module):
         Returns:
             Derivative of x with respect to time
         """
+        if self.fused:
+            return fused_gcn_ode_step(
+                x, self.adj,
+                self.gc1.lin.weight, self.gc1.bias,
+                self.gc2.lin.weight, self.gc2.bias
+            )
+        
         # Apply first graph convolution
-        x = self.gc1(x, self.edge_index)
+        x = self.gc1(x, self.adj)
         x = F.relu(x)
         
         # Apply second graph convolution
-        x = self.gc2(x, self.edge_index)
+        x = self.gc2(x, self.adj)
         
         return x
 
@@ -65,8 +216,14 @@ class GNODEModel(nn.Module):
         hidden_channels (int): Number of hidden features
         out_channels (int): Number of output classes
         edge_index (torch.Tensor): Graph edge connectivity [2, num_edges]
+        ode_method (str): ODE solver ('rk4' is built in, others need torchdiffeq,
+            e.g. adaptive 'dopri5')
+        ode_step_size (float): Step size for fixed-grid solvers
+        ode_atol (float): Absolute tolerance for adaptive solvers
+        ode_rtol (float): Relative tolerance for adaptive solvers
     """
-    def __init__(self, in_channels, hidden_channels, out_channels, edge_index):
+    def __init__(self, in_channels, hidden_channels, out_channels, edge_index,
+                 ode_method='rk4', ode_step_size=0.1, ode_atol=1e-3, ode_rtol=1e-3):
         super(GNODEModel, self).__init__()
         
         # Project input features to hidden dimension
@@ -82,6 +239,62 @@ class GNODEModel(nn.Module):
         self.in_channels = in_channels
         self.hidden_channels = hidden_channels
         self.out_channels = out_channels
+        self.ode_method = ode_method
+        self.ode_step_size = ode_step_size
+        self.ode_atol = ode_atol
+        self.ode_rtol = ode_rtol
+        
+        # Fixed RK4 grid over [0, 1]; the last step is shortened if
+        # step_size does not divide the interval (same grid as torchdiffeq)
+        num_steps = max(1, math.ceil(1.0 / ode_step_size - 1e-6))
+        self._rk4_steps = [ode_step_size] * (num_steps - 1) + [1.0 - ode_step_size * (num_steps - 1)]
+        
+        # Integration interval for torchdiffeq solvers (moves with the model;
+        # not persistent, so checkpoints are unaffected)
+        self.register_buffer('_ode_t', torch.tensor([0.0, 1.0], dtype=torch.float32), persistent=False)
+
+    def _integrate_rk4(self, x):
+        """
+        Integrate the ODE from t0=0 to t1=1 with fixed-step RK4.
+        
+        Hand-unrolled equivalent of odeint(..., method='rk4'): uses the same
+        3/8-rule Runge-Kutta step as torchdiffeq, without its per-step solver
+        bookkeeping (the graph is tiny, so that overhead dominates).
+        ODEFunc ignores t, so it is passed as a constant.
+        """
+        for dt in self._rk4_steps:
+            k1 = self.odefunc(0.0, x)
+            k2 = self.odefunc(0.0, x + dt * k1 / 3)
+            k3 = self.odefunc(0.0, x + dt * (k2 - k1 / 3))
+            k4 = self.odefunc(0.0, x + dt * (k1 - k2 + k3))
+            x = x + (k1 + 3 * (k2 + k3) + k4) * (dt * 0.125)
+        return x
+
+    @torch.jit.unused
+    def _integrate_odeint(self, x):
+        """Integrate the ODE from t0=0 to t1=1 with a torchdiffeq solver"""
+        if not TORCHDIFFEQ_AVAILABLE:
+            raise RuntimeError(f"torchdiffeq is required for ode_method='{self.ode_method}'")
+        from torchdiffeq import odeint
+        if self.ode_method in FIXED_GRID_METHODS:
+            out = odeint(
+                self.odefunc,
+                x,
+                self._ode_t,
+                method=self.ode_method,
+                options={'step_size': self.ode_step_size}
+            )
+        else:
+            out = odeint(
+                self.odefunc,
+                x,
+                self._ode_t,
+                method=self.ode_method,
+                atol=self.ode_atol,
+                rtol=self.ode_rtol
+            )
+        # Take the last time step
+        return out[-1]
 
     def forward(self, x):
         """
@@ -91,30 +304,23 @@ class GNODEModel(nn.Module):
             x: Input node features [num_nodes, in_channels]
             
         Returns:
-            Output logits [num_nodes, out_channels]
+            Output logits [num_nodes, out_channels], float32
         """
-        if not TORCHDIFFEQ_AVAILABLE:
-            raise RuntimeError("torchdiffeq is required but not installed")
+        # Match the parameter dtype (bf16/fp16 models; _ode_t is cast along with the weights)
+        x = x.to(self._ode_t.dtype)
         
         # Project input to hidden dimension
         x = self.input_proj(x)
         x = F.relu(x)
         
-        # Solve ODE from t0=0 to t1=1 using RK4 method
-        t = torch.tensor([0.0, 1.0], dtype=torch.float32, device=x.device)
-        out = odeint(
-            self.odefunc, 
-            x, 
-            t, 
-            method='rk4',  # 4th order Runge-Kutta
-            options={'step_size': 0.1}
-        )
+        # Solve ODE from t0=0 to t1=1
+        if self.ode_method == 'rk4':
+            out = self._integrate_rk4(x)
+        else:
+            out = self._integrate_odeint(x)
         
-        # Take the last time step
-        out = out[-1]
-        
-        # Project to output classes
-        out = self.linear(out)
+        # Project to output classes (float32 logits regardless of model dtype)
+        out = self.linear(out).float()
         
         return out
     
@@ -129,11 +335,37 @@ class GNODEModel(nn.Module):
             Class probabilities [num_nodes, out_channels]
         """
         self.eval()
-        with torch.no_grad():
+        with torch.inference_mode():
             logits = self.forward(x)
             probs = F.softmax(logits, dim=1)
         return probs
     
+    @torch.jit.export
+    def predict_proba_batch(self, xs: List[torch.Tensor]) -> List[torch.Tensor]:
+        """
+        Get probability predictions for several inputs in one forward pass.
+        
+        The inputs are independent copies of the model's graph, so they are
+        stacked along the node dimension and propagated per copy (see
+        propagate) instead of solving the ODE once per input. Exported, so
+        scripted models keep it; run under torch.inference_mode() at the
+        call site (TorchScript can't enter it).
+        
+        Args:
+            xs: Input node features, each [num_nodes, in_channels] with the
+                same num_nodes as the model graph
+            
+        Returns:
+            Class probabilities, one [num_nodes, out_channels] tensor per input
+        """
+        num_nodes = self.odefunc.adj.size(0)
+        for x in xs:
+            if x.size(0) != num_nodes:
+                raise ValueError("predict_proba_batch inputs must match the model graph's node count")
+        logits = self.forward(torch.cat(xs, dim=0))
+        probs = F.softmax(logits, dim=1)
+        return list(probs.split(num_nodes, dim=0))
+    
     def predict(self, x):
         """
         Get class predictions.
@@ -148,7 +380,25 @@ class GNODEModel(nn.Module):
         return probs.argmax(dim=1)
 
 
-def load_gnode_model(model_path, in_channels, hidden_channels, out_channels, edge_index, device='cpu'):
+def quantize_gnode_model(model):
+    """
+    Dynamically quantize a GNODE model's Linear layers to int8 (CPU only).
+    
+    Covers input_proj, the output linear layer and both graph convolutions
+    (GraphConv wraps an nn.Linear). Activations are quantized on the fly,
+    so no calibration data is needed. Scores move by up to ~2 risk points
+    against fp32. Activation scales are computed over the whole input
+    tensor, so score one sample per call: in a batch, a row's result
+    depends on the other rows.
+    """
+    model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    model.odefunc.fused = False
+    return model
+
+
+def load_gnode_model(model_path, in_channels, hidden_channels, out_channels, edge_index, device='cpu',
+                     compile_model=False, quantize=False, dtype=None, script_model=False,
+                     freeze_model=False, **ode_options):
     """
     Load a trained GNODE model from file.
     
@@ -159,6 +409,20 @@ def load_gnode_model(model_path, in_channels, hidden_channels, out_channels, edg
         out_channels (int): Number of output classes
         edge_index (torch.Tensor): Graph edge connectivity
         device (str): Device to load model on ('cpu' or 'cuda')
+        compile_model (bool): Compile forward with torch.compile (first call pays the compile cost)
+        quantize (bool): Quantize Linear layers to int8 (ignored off CPU)
+        dtype (torch.dtype): Cast weights to this reduced-precision float type, e.g.
+            torch.bfloat16 (fast on CPUs with AVX-512 BF16/AMX) or torch.float16
+            (GPU Tensor Cores). Halves weight memory traffic; inputs are cast
+            inside forward, logits come back as float32. Ignored when quantize applies
+        script_model (bool): Compile the whole model with TorchScript (removes Python
+            dispatch for every ODE function evaluation; returns a ScriptModule,
+            which only exposes forward and predict_proba_batch, not predict/predict_proba).
+            'rk4' only
+        freeze_model (bool): torch.jit.freeze the scripted model (weights folded in as
+            constants; faster on CPU). Keeps forward, predict_proba_batch and in_channels
+        **ode_options: Solver settings passed to GNODEModel
+            (ode_method, ode_step_size, ode_atol, ode_rtol)
         
     Returns:
         Loaded GNODE model
@@ -167,15 +431,36 @@ def load_gnode_model(model_path, in_channels, hidden_channels, out_channels, edg
         in_channels=in_channels,
         hidden_channels=hidden_channels,
         out_channels=out_channels,
-        edge_index=edge_index
+        edge_index=edge_index,
+        **ode_options
     )
     
-    # Load state dict
-    state_dict = torch.load(model_path, map_location=device)
+    # Load state dict (mmap pages tensors in lazily; weights_only skips the pickle VM)
+    state_dict = torch.load(model_path, map_location=device, mmap=True, weights_only=True)
     model.load_state_dict(state_dict)
     model.to(device)
     model.eval()
     
+    if quantize and torch.device(device).type == 'cpu':
+        model = quantize_gnode_model(model)
+    elif dtype is not None:
+        model = model.to(dtype)
+    
+    if script_model and model.ode_method != 'rk4':
+        # torchdiffeq solvers run Python code TorchScript can't compile
+        print("⚠️ TorchScript only supports the built-in 'rk4' solver - using eager model")
+    elif script_model:
+        try:
+            scripted = torch.jit.script(model)
+            if freeze_model:
+                scripted = torch.jit.freeze(scripted, preserved_attrs=['in_channels', 'predict_proba_batch'])
+            model = scripted
+        except Exception as e:
+            print(f"⚠️ TorchScript compilation failed ({e}) - using eager model")
+    
+    if compile_model:
+        model.forward = torch.compile(model.forward, mode='reduce-overhead')
+    
     return model
 
 
@@ -203,6 +488,6 @@ if __name__ == "__main__":
     print(f"  ODE step size: {GNODE_CONFIG['ode_step_size']}")
     
     if TORCHDIFFEQ_AVAILABLE:
-        print("\n✅ torchdiffeq is available - GNODE model ready to use")
+        print("\n✅ torchdiffeq is available - all ODE solvers ready to use")
     else:
-        print("\n❌ torchdiffeq not available - install with: pip install torchdiffeq")
+        print("\n⚠️ torchdiffeq not available - built-in 'rk4' solver only (pip install torchdiffeq)")
@@ -0,0 +1,25 @@
+"""
+Production WSGI entry point
+
+    python server.py                                          # waitress (all platforms)
+    gunicorn -w 1 -k gthread --threads 4 -b 0.0.0.0:5001 server:app   # Linux/Mac
+
+Each gunicorn worker is its own process with its own model copy (~820 MB
+RSS) and batching thread, so size -w (or WEB_CONCURRENCY) to the memory and
+CPU available - one per container under the shipped 1 CPU / 2 GiB limits;
+--threads lets one worker overlap requests while GNODE inference runs in
+PyTorch (which releases the GIL).
+"""
+
+from app import create_app
+
+app = create_app()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+    
+    print("🚀 Starting Hamstring Injury Risk Predictor API (waitress)")
+    print(f"   Port: {app.config['PORT']}")
+    print(f"   Threads: {app.config['SERVER_THREADS']}")
+    serve(app, host='0.0.0.0', port=app.config['PORT'], threads=app.config['SERVER_THREADS'])
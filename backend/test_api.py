@@ -3,17 +3,21 @@ Test script for the Flask API
 """
 
 import requests
-import json
+import orjson
 
 BASE_URL = "http://localhost:5000/api"
 
+def dumps(obj):
+    """Pretty-print JSON with orjson"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 def test_health_check():
     """Test health check endpoint"""
     print("\n=== Testing Health Check ===")
     try:
         response = requests.get(f"{BASE_URL}/health")
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        print(f"Response: {dumps(orjson.loads(response.content))}")
         return response.status_code == 200
     except Exception as e:
         print(f"Error: {e}")
@@ -45,11 +49,11 @@ def test_prediction():
     try:
         response = requests.post(
             f"{BASE_URL}/predict",
-            json=data,
+            data=orjson.dumps(data),
             headers={"Content-Type": "application/json"}
         )
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        print(f"Response: {dumps(orjson.loads(response.content))}")
         return response.status_code == 200
     except Exception as e:
         print(f"Error: {e}")
@@ -71,11 +75,11 @@ def test_high_risk_scenario():
     try:
         response = requests.post(
             f"{BASE_URL}/predict",
-            json=data,
+            data=orjson.dumps(data),
             headers={"Content-Type": "application/json"}
         )
         print(f"Status Code: {response.status_code}")
-        result = response.json()
+        result = orjson.loads(response.content)
         print(f"Risk Score: {result.get('riskScore')}%")
         print(f"Risk Level: {result.get('riskLevel')}")
         print(f"Confidence: {result.get('confidence')}%")
@@ -97,11 +101,11 @@ def test_invalid_data():
     try:
         response = requests.post(
             f"{BASE_URL}/predict",
-            json=data,
+            data=orjson.dumps(data),
             headers={"Content-Type": "application/json"}
         )
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        print(f"Response: {dumps(orjson.loads(response.content))}")
         return response.status_code == 400  # Should return error
     except Exception as e:
         print(f"Error: {e}")
@@ -113,7 +117,7 @@ def test_metabolites_endpoint():
     try:
         response = requests.get(f"{BASE_URL}/metabolites")
         print(f"Status Code: {response.status_code}")
-        data = response.json()
+        data = orjson.loads(response.content)
         print(f"Tissues available: {list(data.keys())}")
         print(f"Sweat biomarkers: {list(data.get('sweat', {}).keys())}")
         return response.status_code == 200
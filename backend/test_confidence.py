@@ -0,0 +1,108 @@
+"""
+Test script to verify batched confidence scoring matches the per-request formula
+Run with: python test_confidence.py (or pytest)
+"""
+import itertools
+
+import numpy as np
+
+from app import calculate_confidence
+from utils.confidence_numba import (
+    NUMBA_AVAILABLE,
+    TISSUE_CONFIDENCE_BONUS,
+    BIOMARKER_CONFIDENCE_BONUS,
+    _TISSUE_LUT,
+    _BIOMARKER_LUT,
+    _batch_confidence,
+    batch_confidence,
+    calculate_confidence_batch,
+    encode_metadata
+)
+
+
+def reference_confidence(metadata, risk_score):
+    """The scalar formula calculate_confidence implemented before batching"""
+    num_tissues = len(metadata.get('tissue_scores', {}))
+    confidence = (
+        70
+        + TISSUE_CONFIDENCE_BONUS.get(metadata.get('primary_tissue'), 0)
+        + BIOMARKER_CONFIDENCE_BONUS.get(metadata.get('primary_biomarker'), 0)
+        + 5 * (num_tissues >= 2)
+        + 2 * (num_tissues >= 3)
+        - 5 * (risk_score < 10 or risk_score > 90)
+    )
+    return min(max(confidence, 60), 95)
+
+
+def sample_cases():
+    tissues = ['saliva', 'sweat', 'urine', 'unknown', None]
+    biomarkers = ['lactate', 'cortisol', 'sodium', 'protein', 'unknown', None]
+    tissue_counts = [0, 1, 2, 3]
+    risk_scores = [0.0, 5.0, 9.9, 10.0, 50.0, 90.0, 90.1, 100.0]
+    for tissue, biomarker, count, risk_score in itertools.product(
+            tissues, biomarkers, tissue_counts, risk_scores):
+        metadata = {'tissue_scores': {f't{i}': {} for i in range(count)}}
+        if tissue is not None:
+            metadata['primary_tissue'] = tissue
+        if biomarker is not None:
+            metadata['primary_biomarker'] = biomarker
+        yield metadata, risk_score
+
+
+def test_single_matches_reference():
+    for metadata, risk_score in sample_cases():
+        assert calculate_confidence(metadata, risk_score) == reference_confidence(metadata, risk_score)
+
+
+def test_batch_matches_reference():
+    cases = list(sample_cases())
+    metadata_list, risk_scores = zip(*cases)
+    expected = [reference_confidence(metadata, risk_score) for metadata, risk_score in cases]
+    assert calculate_confidence_batch(metadata_list, risk_scores) == expected
+
+
+def test_python_loop_matches_kernel():
+    # The interpreted loop is what Numba compiles; check it against the active kernel
+    cases = list(sample_cases())
+    codes = np.array([encode_metadata(metadata) for metadata, _ in cases], dtype=np.int64)
+    risk_scores = np.array([risk_score for _, risk_score in cases], dtype=np.float64)
+    loop = _batch_confidence(codes[:, 0], codes[:, 1], codes[:, 2], risk_scores,
+                             _TISSUE_LUT, _BIOMARKER_LUT)
+    kernel = batch_confidence(codes[:, 0], codes[:, 1], codes[:, 2], risk_scores)
+    assert loop.tolist() == kernel.tolist()
+
+
+def test_numpy_fallback_matches_reference():
+    # Re-import the module with numba hidden to exercise the NumPy fallback
+    import importlib
+    import sys
+    saved = {name: sys.modules.get(name) for name in ('numba', 'utils.confidence_numba')}
+    sys.modules['numba'] = None
+    del sys.modules['utils.confidence_numba']
+    try:
+        fallback = importlib.import_module('utils.confidence_numba')
+        assert not fallback.NUMBA_AVAILABLE
+        cases = list(sample_cases())
+        metadata_list, risk_scores = zip(*cases)
+        expected = [reference_confidence(metadata, risk_score) for metadata, risk_score in cases]
+        assert fallback.calculate_confidence_batch(metadata_list, risk_scores) == expected
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def test_empty_batch():
+    assert calculate_confidence_batch([], []) == []
+
+
+if __name__ == '__main__':
+    print(f"🧪 Testing confidence scoring (Numba: {NUMBA_AVAILABLE})\n")
+    for test in (test_single_matches_reference, test_batch_matches_reference,
+                 test_python_loop_matches_kernel, test_numpy_fallback_matches_reference,
+                 test_empty_batch):
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n✅ All confidence tests passed")
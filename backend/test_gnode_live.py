@@ -1,8 +1,12 @@
 """Test if GNODE model is being used by the live API"""
 import requests
-import json
+import orjson
 
 url = "http://127.0.0.1:5001/api/predict"
+
+def dumps(obj):
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 payload = {
     "sweat": {
         "sodium": 1.5,
@@ -15,10 +19,13 @@ payload = {
 
 print("🧪 Testing Live API - Check Flask logs for model type\n")
 print(f"Sending request to: {url}")
-print(f"Payload: {json.dumps(payload, indent=2)}\n")
+print(f"Payload: {dumps(payload)}\n")
 
-response = requests.post(url, json=payload)
+response = requests.post(url, data=orjson.dumps(payload), headers={"Content-Type": "application/json"})
 print(f"✅ Response Status: {response.status_code}")
 print(f"Response Data:")
-print(json.dumps(response.json(), indent=2))
-print("\n💡 Check the Flask server terminal for '✅ GNODE prediction' or '⚠️ Using mock prediction'")
+print(dumps(orjson.loads(response.content)))
+print("\n💡 Check the Flask server startup output for '✅ GNODE model loaded successfully!'")
+print("   (otherwise requests use mock predictions). Per-request lines such as")
+print("   'GNODE batch prediction' or 'Mock batch prediction' are logged at DEBUG")
+print("   level, so they only appear when the server runs with DEBUG=True")
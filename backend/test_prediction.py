@@ -2,7 +2,7 @@
 Test script to verify prediction varies with different inputs
 """
 import requests
-import json
+import orjson
 
 API_URL = "http://localhost:5001/api/predict"
 
@@ -69,10 +69,10 @@ def test_prediction(test_name, data):
     print(f"{'='*60}")
     
     try:
-        response = requests.post(API_URL, json=data, headers={'Content-Type': 'application/json'})
+        response = requests.post(API_URL, data=orjson.dumps(data), headers={'Content-Type': 'application/json'})
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             print(f"✅ Risk Score: {result['riskScore']}%")
             print(f"   Risk Level: {result['riskLevel']}")
             print(f"   Confidence: {result['confidence']}%")
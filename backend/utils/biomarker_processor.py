@@ -3,61 +3,154 @@ Biomarker data processing utilities
 Implements the tissue selection and metabolite prioritization logic
 """
 
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from config import Config
 from .metabolite_database import (
     METABOLITE_DATABASE,
-    TISSUE_RELEVANCE,
-    get_metabolite_info,
-    get_molecular_weight,
-    get_importance_score,
-    calculate_deviation
+    TISSUE_ARRAYS,
+    TISSUE_RELEVANCE
 )
 
 
-def determine_primary_tissue(biomarker_data):
+# Tissues in scoring order (ties between tissues go to the earlier one)
+_TISSUES = ('saliva', 'sweat', 'urine')
+
+# Tissue one-hot encoding (drop_first=True): (tissue_sweat, tissue_urine)
+# Saliva = baseline (0, 0), Sweat = (1, 0), Urine = (0, 1)
+_TISSUE_ENCODING = {
+    'saliva': (0, 0),
+    'sweat': (1, 0),
+    'urine': (0, 1)
+}
+
+
+def _coerce_tissue_values(tissue_data, arrays):
     """
-    Determines which tissue type to use for model input based on:
-    1. Elevation scores (how far values are from normal)
-    2. Clinical relevance of tissue type
-    3. Data completeness
+    Walk one tissue's submitted values once, keeping the recognized,
+    numeric biomarkers in submission order. Blank and non-numeric values
+    are skipped (validate_biomarker_data reports them).
     
-    Returns: tuple (primary_tissue, score, details)
+    Returns: (names, idx, values) where idx indexes the tissue's SoA arrays
+    """
+    names, idx, values = [], [], []
+    for biomarker, value in tissue_data.items():
+        if value is None or value == '':
+            continue
+        
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            continue
+        
+        i = arrays['idx'].get(biomarker)
+        if i is None:
+            continue
+        
+        names.append(biomarker)
+        idx.append(i)
+        values.append(value)
+    
+    return names, np.array(idx, dtype=np.intp), np.array(values, dtype=np.float64)
+
+
+def _score_tissue_loop(values, idx, mid, half_width, importance):
+    # Explicit loop for Numba: one pass, no temporary arrays.
+    # No branch-and-bound cutoff on importance * 2.0: every deviation feeds
+    # the elevation sum and the reported metabolite_scores, so pruning the
+    # argmax would save no work
+    n = values.shape[0]
+    deviations = np.empty(n)
+    scores = np.empty(n)
+    elevation = 0.0
+    best = 0
+    for k in range(n):
+        i = idx[k]
+        deviation = abs(values[k] - mid[i]) / half_width[i]
+        if deviation > 2.0:
+            deviation = 2.0
+        deviations[k] = deviation
+        scores[k] = importance[i] * deviation
+        elevation += deviation
+        # First maximum wins, NaN counts as maximum (same as np.argmax)
+        if scores[best] == scores[best] and (scores[k] > scores[best] or scores[k] != scores[k]):
+            best = k
+    return deviations, scores, elevation, best
+
+
+def _score_tissue_numpy(values, idx, mid, half_width, importance):
+    deviations = np.minimum(np.abs(values - mid[idx]) / half_width[idx], 2.0)
+    scores = importance[idx] * deviations
+    best = int(scores.argmax()) if len(scores) else 0
+    return deviations, scores, float(deviations.sum()), best
+
+
+if NUMBA_AVAILABLE:
+    _score_tissue_kernel = njit(cache=True)(_score_tissue_loop)
+    # Compile at import (or load from cache) so the first request doesn't pay for it
+    _score_tissue_kernel(
+        np.ones(3), np.arange(3, dtype=np.intp), np.ones(3), np.ones(3), np.ones(3)
+    )
+else:
+    _score_tissue_kernel = _score_tissue_numpy
+
+
+def score_tissue(values, idx, arrays):
+    """
+    Score gathered biomarker values against a tissue's SoA arrays.
+    
+    Returns: (deviations, scores, elevation, best) - per-biomarker
+    deviations (capped at 2.0) and importance * deviation scores, their
+    deviation sum, and the index of the highest score (first on ties)
+    """
+    return _score_tissue_kernel(
+        values, idx, arrays['mid'], arrays['half_width'], arrays['importance']
+    )
+
+
+def _score_tissues(biomarker_data):
+    """
+    Coerce and score each submitted tissue exactly once.
+    
+    Returns: (tissue_scores, scored) where tissue_scores is the per-tissue
+    details dict of determine_primary_tissue and scored[tissue] holds
+    (names, idx, values, deviations, scores, best) for reuse when ranking
+    that tissue's metabolites
     """
     tissue_scores = {}
+    scored = {}
     
-    for tissue_type in ['saliva', 'sweat', 'urine']:
-        if tissue_type not in biomarker_data:
-            continue
-            
-        tissue_data = biomarker_data[tissue_type]
+    for tissue_type in _TISSUES:
+        tissue_data = biomarker_data.get(tissue_type)
         
         # Skip if no data for this tissue
-        if not tissue_data or not any(tissue_data.values()):
+        if not tissue_data:
             continue
         
-        # Calculate elevation score (max 2.0 per biomarker)
-        elevation_score = 0.0
-        valid_biomarkers = 0
+        arrays = TISSUE_ARRAYS[tissue_type]
         
-        for biomarker, value in tissue_data.items():
-            if value is None or value == '':
-                continue
-                
-            try:
-                value = float(value)
-            except (ValueError, TypeError):
-                continue
-            
-            info = get_metabolite_info(tissue_type, biomarker)
-            if not info:
-                continue
-            
-            deviation = calculate_deviation(value, info['normal_range'])
-            elevation_score += deviation
-            valid_biomarkers += 1
+        # Calculate elevation score (max 2.0 per biomarker)
+        names, idx, values = _coerce_tissue_values(tissue_data, arrays)
+        valid_biomarkers = len(values)
         
         if valid_biomarkers == 0:
             continue
         
+        # A tissue whose submitted values are all falsy (e.g. all 0) counts
+        # as no data; any nonzero coerced value rules that out, so the raw
+        # values only need checking when every coerced value is zero
+        if not values.any() and not any(tissue_data.values()):
+            continue
+        
+        deviations, scores, elevation_score, best = score_tissue(values, idx, arrays)
+        scored[tissue_type] = (names, idx, values, deviations, scores, best)
+        
         # Average elevation score
         avg_elevation = elevation_score / valid_biomarkers
         
@@ -65,7 +158,7 @@ def determine_primary_tissue(biomarker_data):
         relevance = TISSUE_RELEVANCE.get(tissue_type, 0.5)
         
         # Data completeness score (0-0.3)
-        total_biomarkers = len(METABOLITE_DATABASE[tissue_type])
+        total_biomarkers = len(arrays['names'])
         completeness = (valid_biomarkers / total_biomarkers) * 0.3
         
         # Total score = elevation (0-2) + relevance (0-1) + completeness (0-0.3)
@@ -82,63 +175,84 @@ def determine_primary_tissue(biomarker_data):
     if not tissue_scores:
         raise ValueError("No valid biomarker data provided")
     
-    # Select tissue with highest score
-    primary_tissue = max(tissue_scores.items(), key=lambda x: x[1]['score'])
-    
-    return primary_tissue[0], primary_tissue[1], tissue_scores
+    return tissue_scores, scored
 
 
-def select_primary_metabolite(tissue_data, tissue_type):
+def _primary_tissue(tissue_scores):
+    # Select tissue with highest score (first one wins ties)
+    tissues = list(tissue_scores)
+    totals = np.array([tissue_scores[tissue]['score'] for tissue in tissues])
+    return tissues[int(totals.argmax())]
+
+
+def determine_primary_tissue(biomarker_data):
     """
-    Selects which metabolite from the chosen tissue to use for molecular weight.
-    Priority: importance_score * deviation_from_normal
+    Determines which tissue type to use for model input based on:
+    1. Elevation scores (how far values are from normal)
+    2. Clinical relevance of tissue type
+    3. Data completeness
     
-    Returns: tuple (biomarker_name, molecular_weight, details)
+    Returns: tuple (primary_tissue, score, details)
     """
-    metabolite_scores = {}
+    tissue_scores, _ = _score_tissues(biomarker_data)
+    primary_tissue = _primary_tissue(tissue_scores)
+    return primary_tissue, tissue_scores[primary_tissue], tissue_scores
+
+
+def _rank_metabolites(tissue_type, names, idx, values, deviations, scores, best):
+    """Build the metabolite details dict from a scored tissue and pick the primary one"""
+    arrays = TISSUE_ARRAYS[tissue_type]
     
-    for biomarker, value in tissue_data.items():
-        if value is None or value == '':
-            continue
-        
-        try:
-            value = float(value)
-        except (ValueError, TypeError):
-            continue
-        
-        info = get_metabolite_info(tissue_type, biomarker)
-        if not info:
-            continue
-        
-        # Calculate selection score
-        importance = info['importance']
-        deviation = calculate_deviation(value, info['normal_range'])
-        
-        # Score = importance (0-1) * deviation (0-2)
-        score = importance * deviation
-        
-        metabolite_scores[biomarker] = {
+    metabolite_scores = {
+        biomarker: {
             'score': score,
             'value': value,
-            'molecular_weight': info['molecular_weight'],
-            'importance': importance,
+            'molecular_weight': mw,
+            'importance': imp,
             'deviation': deviation,
-            'normal_range': info['normal_range']
+            'normal_range': (normal_min, normal_max)
         }
+        for biomarker, score, value, mw, imp, deviation, normal_min, normal_max in zip(
+            names,
+            scores.tolist(),
+            values.tolist(),
+            arrays['mw'][idx].tolist(),
+            arrays['importance'][idx].tolist(),
+            deviations.tolist(),
+            arrays['min'][idx].tolist(),
+            arrays['max'][idx].tolist()
+        )
+    }
     
     if not metabolite_scores:
         raise ValueError(f"No valid metabolites in {tissue_type} data")
     
-    # Select metabolite with highest score
-    primary_metabolite = max(metabolite_scores.items(), key=lambda x: x[1]['score'])
+    # Select metabolite with highest score (first submitted wins ties)
+    primary_metabolite = names[best]
     
     return (
-        primary_metabolite[0],
-        primary_metabolite[1]['molecular_weight'],
+        primary_metabolite,
+        metabolite_scores[primary_metabolite]['molecular_weight'],
         metabolite_scores
     )
 
 
+def select_primary_metabolite(tissue_data, tissue_type):
+    """
+    Selects which metabolite from the chosen tissue to use for molecular weight.
+    Priority: importance_score * deviation_from_normal
+    
+    Returns: tuple (biomarker_name, molecular_weight, details)
+    """
+    arrays = TISSUE_ARRAYS[tissue_type]
+    names, idx, values = _coerce_tissue_values(tissue_data, arrays)
+    
+    # Score = importance (0-1) * deviation (0-2)
+    deviations, scores, _, best = score_tissue(values, idx, arrays)
+    
+    return _rank_metabolites(tissue_type, names, idx, values, deviations, scores, best)
+
+
 def prepare_model_features(biomarker_data, emg_data=None):
     """
     Converts biomarker data to GNODE model input features.
@@ -159,39 +273,25 @@ def prepare_model_features(biomarker_data, emg_data=None):
         'waveform_length': float
     }
     """
-    from config import Config
-    
-    # Step 1: Determine primary tissue
-    primary_tissue, tissue_scores, all_scores = determine_primary_tissue(biomarker_data)
+    # Step 1: Determine primary tissue (each tissue is coerced and scored once)
+    all_scores, scored = _score_tissues(biomarker_data)
+    primary_tissue = _primary_tissue(all_scores)
     
-    # Step 2: Select primary metabolite from that tissue
-    tissue_data = biomarker_data[primary_tissue]
-    primary_biomarker, molecular_weight, metabolite_scores = select_primary_metabolite(
-        tissue_data, primary_tissue
+    # Step 2: Select primary metabolite from that tissue, reusing its scores
+    primary_biomarker, molecular_weight, metabolite_scores = _rank_metabolites(
+        primary_tissue, *scored[primary_tissue]
     )
     
     # Step 3: Encode tissue type (one-hot with drop_first=True)
-    # Saliva = baseline [0, 0]
-    # Sweat = [1, 0]
-    # Urine = [0, 1]
-    tissue_encoding = {
-        'saliva': {'tissue_sweat': 0, 'tissue_urine': 0},
-        'sweat': {'tissue_sweat': 1, 'tissue_urine': 0},
-        'urine': {'tissue_sweat': 0, 'tissue_urine': 1}
-    }
-    
-    tissue_features = tissue_encoding[primary_tissue]
-    
-    # Step 4: Handle EMG features (use defaults if not provided)
-    emg_features = Config.DEFAULT_EMG_VALUES.copy()
-    if emg_data:
-        emg_features.update(emg_data)
+    tissue_sweat, tissue_urine = _TISSUE_ENCODING[primary_tissue]
     
-    # Step 5: Combine all features
+    # Step 4 + 5: Combine all features (EMG defaults, overridden by emg_data if provided)
     model_input = {
         'mw': molecular_weight,
-        **tissue_features,
-        **emg_features
+        'tissue_sweat': tissue_sweat,
+        'tissue_urine': tissue_urine,
+        **Config.DEFAULT_EMG_VALUES,
+        **(emg_data or {})
     }
     
     # Return features plus metadata for transparency
@@ -217,10 +317,9 @@ def validate_biomarker_data(biomarker_data):
         errors.append("Biomarker data must be a dictionary")
         return False, errors
     
-    valid_tissues = ['saliva', 'sweat', 'urine']
     has_data = False
     
-    for tissue in valid_tissues:
+    for tissue in _TISSUES:
         if tissue not in biomarker_data:
             continue
         
@@ -230,6 +329,9 @@ def validate_biomarker_data(biomarker_data):
             errors.append(f"{tissue} data must be a dictionary")
             continue
         
+        arrays = TISSUE_ARRAYS[tissue]
+        ext_bounds = arrays['ext_bounds']
+        
         for biomarker, value in tissue_data.items():
             if value is None or value == '':
                 continue
@@ -237,28 +339,27 @@ def validate_biomarker_data(biomarker_data):
             has_data = True
             
             # Check if biomarker exists in database
-            if biomarker not in METABOLITE_DATABASE.get(tissue, {}):
+            i = arrays['idx'].get(biomarker)
+            if i is None:
                 errors.append(f"Unknown biomarker: {tissue}.{biomarker}")
                 continue
             
             # Validate value is numeric
             try:
                 float_value = float(value)
-                
-                # Check if within reasonable bounds (extended range)
-                info = get_metabolite_info(tissue, biomarker)
-                if info:
-                    min_val, max_val = info['normal_range']
-                    extended_min = min_val * 0.1  # Allow 10x below
-                    extended_max = max_val * 10   # Allow 10x above
-                    
-                    if float_value < extended_min or float_value > extended_max:
-                        errors.append(
-                            f"{tissue}.{biomarker} value {float_value} is extremely "
-                            f"out of range (expected roughly {min_val}-{max_val} {info['unit']})"
-                        )
             except (ValueError, TypeError):
                 errors.append(f"{tissue}.{biomarker} must be a number, got: {value}")
+                continue
+            
+            # Check if within reasonable bounds (extended range, precomputed)
+            extended_min, extended_max = ext_bounds[i]
+            if float_value < extended_min or float_value > extended_max:
+                info = METABOLITE_DATABASE[tissue][biomarker]
+                min_val, max_val = info.normal_range
+                errors.append(
+                    f"{tissue}.{biomarker} value {float_value} is extremely "
+                    f"out of range (expected roughly {min_val}-{max_val} {info.unit})"
+                )
     
     if not has_data:
         errors.append("No valid biomarker data provided")
@@ -0,0 +1,105 @@
+"""
+Batched confidence scoring
+Same formula as app.calculate_confidence, applied to a whole batch of
+predictions at once (JIT-compiled with Numba when it is installed)
+"""
+
+import numpy as np
+
+from .metabolite_database import METABOLITE_DATABASE
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Confidence bonuses by primary tissue / biomarker (sweat and lactate are most relevant)
+TISSUE_CONFIDENCE_BONUS = {'sweat': 10, 'urine': 5}
+BIOMARKER_CONFIDENCE_BONUS = {'lactate': 10}
+
+# Integer codes for primary tissue / biomarker; the last code means "unknown"
+TISSUE_CODES = {tissue: code for code, tissue in enumerate(METABOLITE_DATABASE)}
+BIOMARKER_CODES = {
+    biomarker: code
+    for code, biomarker in enumerate(sorted(
+        {biomarker for metabolites in METABOLITE_DATABASE.values() for biomarker in metabolites}
+    ))
+}
+
+# Bonus lookup tables indexed by code (unknown code -> 0)
+_TISSUE_LUT = np.array(
+    [TISSUE_CONFIDENCE_BONUS.get(tissue, 0) for tissue in TISSUE_CODES] + [0],
+    dtype=np.int64
+)
+_BIOMARKER_LUT = np.array(
+    [BIOMARKER_CONFIDENCE_BONUS.get(biomarker, 0) for biomarker in BIOMARKER_CODES] + [0],
+    dtype=np.int64
+)
+
+
+def encode_metadata(metadata):
+    """
+    Encode prediction metadata as (tissue_code, biomarker_code, num_tissues)
+    for batch_confidence
+    """
+    return (
+        TISSUE_CODES.get(metadata.get('primary_tissue'), len(TISSUE_CODES)),
+        BIOMARKER_CODES.get(metadata.get('primary_biomarker'), len(BIOMARKER_CODES)),
+        len(metadata.get('tissue_scores', {}))
+    )
+
+
+def _batch_confidence(tissue_codes, biomarker_codes, num_tissues, risk_scores,
+                      tissue_lut, biomarker_lut):
+    out = np.empty(risk_scores.shape[0], dtype=np.int64)
+    for i in range(risk_scores.shape[0]):
+        confidence = 70 + tissue_lut[tissue_codes[i]] + biomarker_lut[biomarker_codes[i]]
+        if num_tissues[i] >= 2:
+            confidence += 5
+        if num_tissues[i] >= 3:
+            confidence += 2
+        if risk_scores[i] < 10 or risk_scores[i] > 90:
+            confidence -= 5
+        out[i] = min(max(confidence, 60), 95)
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _batch_confidence_kernel = njit(cache=True)(_batch_confidence)
+else:
+    def _batch_confidence_kernel(tissue_codes, biomarker_codes, num_tissues, risk_scores,
+                                 tissue_lut, biomarker_lut):
+        # NumPy fallback: same arithmetic, vectorized over the batch
+        confidence = (
+            70
+            + tissue_lut[tissue_codes]
+            + biomarker_lut[biomarker_codes]
+            + 5 * (num_tissues >= 2)
+            + 2 * (num_tissues >= 3)
+            - 5 * ((risk_scores < 10) | (risk_scores > 90))
+        )
+        return np.clip(confidence, 60, 95)
+
+
+def batch_confidence(tissue_codes, biomarker_codes, num_tissues, risk_scores):
+    """
+    Confidence percentages (60-95) for a batch of encoded predictions.
+    All arguments are equal-length 1-D arrays; returns an int64 array.
+    """
+    return _batch_confidence_kernel(
+        np.ascontiguousarray(tissue_codes, dtype=np.int64),
+        np.ascontiguousarray(biomarker_codes, dtype=np.int64),
+        np.ascontiguousarray(num_tissues, dtype=np.int64),
+        np.ascontiguousarray(risk_scores, dtype=np.float64),
+        _TISSUE_LUT,
+        _BIOMARKER_LUT
+    )
+
+
+def calculate_confidence_batch(metadata_list, risk_scores):
+    """Confidence percentages for parallel lists of metadata dicts and risk scores"""
+    codes = np.array([encode_metadata(metadata) for metadata in metadata_list],
+                     dtype=np.int64).reshape(-1, 3)
+    return batch_confidence(codes[:, 0], codes[:, 1], codes[:, 2], risk_scores).tolist()
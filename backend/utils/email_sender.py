@@ -3,12 +3,351 @@ Email utility for sending assessment results
 Supports both SendGrid (recommended) and Gmail SMTP
 """
 
+import asyncio
+import atexit
+import functools
+import html
+import logging
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from string import Template
 import os
 
+from .recommendation_generator import _BASE_RECS
+
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    AIOSMTPLIB_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# HTML email body, compiled once at import; $placeholders are filled per email
+_EMAIL_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 600px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 30px;
+            text-align: center;
+            border-radius: 10px 10px 0 0;
+        }
+        .content {
+            background: #f9f9f9;
+            padding: 30px;
+            border-radius: 0 0 10px 10px;
+        }
+        .risk-box {
+            background: white;
+            padding: 20px;
+            border-radius: 10px;
+            margin: 20px 0;
+            border-left: 5px solid #667eea;
+        }
+        .risk-score {
+            font-size: 48px;
+            font-weight: bold;
+            color: #667eea;
+            margin: 10px 0;
+        }
+        .section {
+            background: white;
+            padding: 20px;
+            border-radius: 10px;
+            margin: 15px 0;
+        }
+        .section h3 {
+            color: #667eea;
+            margin-top: 0;
+        }
+        .recommendation-list {
+            list-style-type: none;
+            padding-left: 0;
+        }
+        .recommendation-list li {
+            padding: 8px 0;
+            padding-left: 25px;
+            position: relative;
+        }
+        .recommendation-list li:before {
+            content: "▸";
+            position: absolute;
+            left: 0;
+            color: #667eea;
+            font-weight: bold;
+        }
+        .footer {
+            text-align: center;
+            color: #777;
+            font-size: 12px;
+            margin-top: 30px;
+            padding-top: 20px;
+            border-top: 1px solid #ddd;
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🏃 Hamstring Injury Risk Assessment</h1>
+        <p>Powered by GNODE AI</p>
+    </div>
+
+    <div class="content">
+        <p>Dear $recipient_name,</p>
+
+        <p>Your hamstring injury risk assessment has been completed. Here are your results:</p>
+
+        <div class="risk-box">
+            <h2 style="margin-top: 0;">Your Risk Assessment</h2>
+            <div class="risk-score">$risk_emoji $risk_score%</div>
+            <p style="font-size: 20px; font-weight: bold; color: #333;">Risk Level: $risk_level</p>
+            <p style="color: #666;">Model Confidence: $confidence%</p>
+        </div>
+
+        <div class="section">
+            <h3>📊 Key Indicators</h3>
+            <p>$key_indicators</p>
+        </div>
+
+        <div class="section">
+            <h3>⚠️ Immediate Actions</h3>
+            <ul class="recommendation-list">
+                $immediate_items
+            </ul>
+        </div>
+
+        <div class="section">
+            <h3>📅 Follow-Up (Within 3-5 Days)</h3>
+            <ul class="recommendation-list">
+                $follow_up_items
+            </ul>
+        </div>
+
+        <div class="section">
+            <h3>📈 Ongoing Monitoring</h3>
+            <ul class="recommendation-list">
+                $monitoring_items
+            </ul>
+        </div>
+
+        <p style="margin-top: 30px;">
+            <strong>Important:</strong> This assessment is for informational purposes. 
+            Please consult with qualified healthcare professionals for medical advice and treatment decisions.
+        </p>
+
+        <div class="footer">
+            <p>Generated on $generated_on</p>
+            <p>© 2025 Hamstring Injury Risk Predictor | Powered by GNODE AI</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+_RISK_EMOJI = {
+    'LOW': '✅',
+    'MODERATE': '⚠️',
+    'HIGH': '🔴',
+    'CRITICAL': '🚨'
+}
+
+# "Generated on" stamp for the current minute: (epoch minute, formatted text)
+_generated_on_cache = (None, '')
+
+# Background sender so SMTP/SendGrid round-trips don't block request threads
+_email_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='email-sender')
+
+# Persistent SMTP connection (connect + STARTTLS + login once, reused across emails)
+_smtp_lock = threading.Lock()
+_smtp_conn = None
+_smtp_settings = None
+
+
+def generated_on():
+    """
+    Current time as shown in the email footer. The format has minute
+    resolution, so it is only re-formatted when the minute changes.
+    """
+    global _generated_on_cache
+    minute = int(time.time() // 60)
+    cached_minute, text = _generated_on_cache
+    if cached_minute != minute:
+        text = datetime.now().strftime('%B %d, %Y at %I:%M %p')
+        _generated_on_cache = (minute, text)
+    return text
+
+
+def render_html_body(recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations,
+                     generated_on_text=None):
+    """
+    Fill the results email template.
+    
+    Bulk senders can pass generated_on_text (from generated_on()) once for
+    the whole batch instead of looking up the time per email.
+    """
+    return _EMAIL_TEMPLATE.substitute(
+        template_fields(recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations),
+        generated_on=generated_on_text or generated_on()
+    )
+
+
+def list_items(items):
+    """Render recommendation strings as HTML-escaped <li> elements"""
+    return ''.join(f'<li>{html.escape(str(item))}</li>' for item in items)
+
+
+def template_fields(recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
+    """
+    Placeholder values shared by the SMTP and SendGrid email templates.
+    Everything comes from the client request, so it is HTML-escaped.
+    """
+    return {
+        'recipient_name': html.escape(str(recipient_name)),
+        'risk_emoji': _RISK_EMOJI.get(risk_level, '⚠️'),
+        'risk_score': html.escape(str(risk_score)),
+        'risk_level': html.escape(str(risk_level)),
+        'confidence': html.escape(str(confidence)),
+        'key_indicators': html.escape(str(key_indicators)),
+        'immediate_items': recommendation_items(risk_level, recommendations, 'immediate'),
+        'follow_up_items': recommendation_items(risk_level, recommendations, 'followUp'),
+        'monitoring_items': recommendation_items(risk_level, recommendations, 'monitoring')
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def _base_list_items(risk_level):
+    """
+    Rendered <li> HTML for a risk level's base recommendations, which every
+    email at that level shares: {key: (items, html)}
+    """
+    base_recs = _BASE_RECS.get(risk_level, {})
+    return {
+        key: (items, list_items(items))
+        for key, items in ((key, base_recs.get(key, ())) for key in ('immediate', 'followUp', 'monitoring'))
+    }
+
+
+def recommendation_items(risk_level, recommendations, key):
+    """
+    <li> HTML for recommendations[key]. The base recommendations for the
+    risk level (generate_recommendations puts them first) come from the
+    per-level cache; only the biomarker-specific tail is rendered.
+    """
+    items = recommendations[key]
+    base, base_html = _base_list_items(risk_level)[key]
+    if base and tuple(items[:len(base)]) == base:
+        return base_html + list_items(items[len(base):])
+    return list_items(items)
+
+
+def email_configured():
+    """True if SendGrid or SMTP credentials are set (without sending anything)"""
+    if os.getenv('USE_SENDGRID', 'true').lower() == 'true' and os.getenv('SENDGRID_API_KEY'):
+        return True
+    
+    EMAIL_USER = os.getenv('EMAIL_USER')
+    EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
+    return bool(
+        EMAIL_USER and EMAIL_PASSWORD
+        and EMAIL_USER != 'your-email@gmail.com'
+        and EMAIL_PASSWORD != 'your-app-specific-password'
+    )
+
+
+def send_results_email_async(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
+    """
+    Queue send_results_email on the background sender and return immediately.
+    
+    Returns a Future resolving to send_results_email's result
+    """
+    future = _email_executor.submit(
+        send_results_email,
+        to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations
+    )
+    future.add_done_callback(functools.partial(_report_email_failure, to_email))
+    return future
+
+
+def _smtp_connect(host, port, user, password):
+    server = smtplib.SMTP(host, port, timeout=30)
+    server.starttls()
+    server.login(user, password)
+    return server
+
+
+def _smtp_close():
+    global _smtp_conn
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.quit()
+        except (smtplib.SMTPException, OSError):
+            _smtp_conn.close()
+        _smtp_conn = None
+
+
+def _smtp_send(msg, host, port, user, password):
+    """
+    Send msg over the shared SMTP connection, (re)connecting if it is
+    missing, stale (NOOP fails) or was opened with different settings.
+    Retries once on a fresh connection if the server hung up mid-send.
+    """
+    global _smtp_conn, _smtp_settings
+    settings = (host, port, user, password)
+    
+    with _smtp_lock:
+        if _smtp_conn is not None:
+            try:
+                alive = _smtp_settings == settings and _smtp_conn.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if not alive:
+                _smtp_close()
+        
+        if _smtp_conn is None:
+            _smtp_conn = _smtp_connect(host, port, user, password)
+            _smtp_settings = settings
+        
+        try:
+            _smtp_conn.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            _smtp_close()
+            _smtp_conn = _smtp_connect(host, port, user, password)
+            _smtp_conn.send_message(msg)
+
+
+atexit.register(_smtp_close)
+
+
+def _report_email_failure(to_email, future):
+    """
+    Done-callback for background sends: the request that queued the email
+    has already returned, so failures go to the app log
+    """
+    try:
+        sent = future.result()
+    except Exception:
+        logger.exception("Background email to %s failed", to_email)
+        return
+    if not sent:
+        logger.error("Background email to %s was not sent (see sender output above)", to_email)
+
 
 def send_results_email(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
     """
@@ -48,8 +387,76 @@ def send_with_smtp(to_email, recipient_name, risk_score, risk_level, confidence,
     
     For Gmail: Use App Password from https://myaccount.google.com/apppasswords
     """
+    settings = _smtp_config(to_email, recipient_name, risk_score, risk_level, confidence)
+    if settings is None:
+        # Return False to indicate email wasn't sent
+        return False
     
-    # Email configuration from environment variables
+    try:
+        msg = _build_message(
+            settings[2], to_email, recipient_name, risk_score, risk_level, confidence,
+            key_indicators, recommendations
+        )
+        
+        # Send email (reuses the open SMTP session when possible)
+        _smtp_send(msg, *settings)
+        
+        print(f"✅ Email sent successfully to {to_email}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error sending email: {e}")
+        return False
+
+
+async def send_with_smtp_async(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
+    """
+    Async variant of send_with_smtp for asyncio callers.
+    
+    With aiosmtplib installed the STARTTLS, login and DATA round-trips are
+    awaited on the event loop (one connection per call); otherwise
+    send_with_smtp runs in a worker thread. Same settings and return value.
+    """
+    if not AIOSMTPLIB_AVAILABLE:
+        return await asyncio.to_thread(
+            send_with_smtp,
+            to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations
+        )
+    
+    settings = _smtp_config(to_email, recipient_name, risk_score, risk_level, confidence)
+    if settings is None:
+        return False
+    EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD = settings
+    
+    try:
+        msg = _build_message(
+            EMAIL_USER, to_email, recipient_name, risk_score, risk_level, confidence,
+            key_indicators, recommendations
+        )
+        
+        await aiosmtplib.send(
+            msg,
+            hostname=EMAIL_HOST,
+            port=EMAIL_PORT,
+            username=EMAIL_USER,
+            password=EMAIL_PASSWORD,
+            start_tls=True,
+            timeout=30
+        )
+        
+        print(f"✅ Email sent successfully to {to_email}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error sending email: {e}")
+        return False
+
+
+def _smtp_config(to_email, recipient_name, risk_score, risk_level, confidence):
+    """
+    SMTP settings from environment variables as (host, port, user, password),
+    or None (after printing setup help) if they are missing or placeholders
+    """
     EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
     EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
     EMAIL_USER = os.getenv('EMAIL_USER')
@@ -70,177 +477,28 @@ def send_with_smtp(to_email, recipient_name, risk_score, risk_level, confidence,
         print(f"   Recipient: {recipient_name}")
         print(f"   Risk Score: {risk_score}% ({risk_level})")
         print(f"   Confidence: {confidence}%\n")
-        # Return False to indicate email wasn't sent
-        return False
+        return None
     
     # Validate email configuration
     if EMAIL_USER == 'your-email@gmail.com' or EMAIL_PASSWORD == 'your-app-specific-password':
         print("\n⚠️  Please update EMAIL_USER and EMAIL_PASSWORD in backend/.env file")
         print("   See backend/EMAIL_SETUP.md for instructions\n")
-        return False
+        return None
     
-    try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = EMAIL_USER
-        msg['To'] = to_email
-        msg['Subject'] = f'🏃 Hamstring Injury Risk Assessment - {risk_level} Risk'
-        
-        # Get risk emoji
-        risk_emoji = {
-            'LOW': '✅',
-            'MODERATE': '⚠️',
-            'HIGH': '🔴',
-            'CRITICAL': '🚨'
-        }.get(risk_level, '⚠️')
-        
-        # Create HTML email body
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    text-align: center;
-                    border-radius: 10px 10px 0 0;
-                }}
-                .content {{
-                    background: #f9f9f9;
-                    padding: 30px;
-                    border-radius: 0 0 10px 10px;
-                }}
-                .risk-box {{
-                    background: white;
-                    padding: 20px;
-                    border-radius: 10px;
-                    margin: 20px 0;
-                    border-left: 5px solid #667eea;
-                }}
-                .risk-score {{
-                    font-size: 48px;
-                    font-weight: bold;
-                    color: #667eea;
-                    margin: 10px 0;
-                }}
-                .section {{
-                    background: white;
-                    padding: 20px;
-                    border-radius: 10px;
-                    margin: 15px 0;
-                }}
-                .section h3 {{
-                    color: #667eea;
-                    margin-top: 0;
-                }}
-                .recommendation-list {{
-                    list-style-type: none;
-                    padding-left: 0;
-                }}
-                .recommendation-list li {{
-                    padding: 8px 0;
-                    padding-left: 25px;
-                    position: relative;
-                }}
-                .recommendation-list li:before {{
-                    content: "▸";
-                    position: absolute;
-                    left: 0;
-                    color: #667eea;
-                    font-weight: bold;
-                }}
-                .footer {{
-                    text-align: center;
-                    color: #777;
-                    font-size: 12px;
-                    margin-top: 30px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🏃 Hamstring Injury Risk Assessment</h1>
-                <p>Powered by GNODE AI</p>
-            </div>
-            
-            <div class="content">
-                <p>Dear {recipient_name},</p>
-                
-                <p>Your hamstring injury risk assessment has been completed. Here are your results:</p>
-                
-                <div class="risk-box">
-                    <h2 style="margin-top: 0;">Your Risk Assessment</h2>
-                    <div class="risk-score">{risk_emoji} {risk_score}%</div>
-                    <p style="font-size: 20px; font-weight: bold; color: #333;">Risk Level: {risk_level}</p>
-                    <p style="color: #666;">Model Confidence: {confidence}%</p>
-                </div>
-                
-                <div class="section">
-                    <h3>📊 Key Indicators</h3>
-                    <p>{key_indicators}</p>
-                </div>
-                
-                <div class="section">
-                    <h3>⚠️ Immediate Actions</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['immediate'])}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h3>📅 Follow-Up (Within 3-5 Days)</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['followUp'])}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h3>📈 Ongoing Monitoring</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['monitoring'])}
-                    </ul>
-                </div>
-                
-                <p style="margin-top: 30px;">
-                    <strong>Important:</strong> This assessment is for informational purposes. 
-                    Please consult with qualified healthcare professionals for medical advice and treatment decisions.
-                </p>
-                
-                <div class="footer">
-                    <p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                    <p>© 2025 Hamstring Injury Risk Predictor | Powered by GNODE AI</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Attach HTML body
-        html_part = MIMEText(html_body, 'html')
-        msg.attach(html_part)
-        
-        # Send email
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        
-        print(f"✅ Email sent successfully to {to_email}")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error sending email: {e}")
-        return False
+    return EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD
+
+
+def _build_message(from_email, to_email, recipient_name, risk_score, risk_level, confidence,
+                   key_indicators, recommendations):
+    """Create the results email message (a single text/html part, no multipart wrapper)"""
+    # Create HTML email body
+    html_body = render_html_body(
+        recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations
+    )
+    
+    msg = MIMEText(html_body, 'html')
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = f'🏃 Hamstring Injury Risk Assessment - {risk_level} Risk'
+    
+    return msg
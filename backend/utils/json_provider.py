@@ -0,0 +1,41 @@
+"""
+orjson-backed JSON provider for Flask
+Drop-in replacement for Flask's DefaultJSONProvider; jsonify() routes through it
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson (handles numpy scalars natively)"""
+
+    def _options(self, **kwargs):
+        """Translate json.dumps-style keyword arguments into orjson options"""
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize data as JSON to UTF-8 bytes"""
+        return orjson.dumps(obj, default=self.default, option=self._options(**kwargs))
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON to a string"""
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON from a string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as a JSON response without a str round-trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
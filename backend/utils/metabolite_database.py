@@ -2,7 +2,24 @@
 Metabolite database with molecular weights, normal ranges, and clinical importance
 """
 
-METABOLITE_DATABASE = {
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True, slots=True)
+class MetaboliteInfo:
+    """Immutable record for one biomarker (attribute access, no per-instance dict)"""
+    name: str
+    molecular_weight: float  # Da
+    formula: str
+    normal_range: tuple  # (min, max) in `unit`
+    unit: str
+    importance: float  # Scale 0-1 for injury prediction
+    description: str
+
+
+_METABOLITE_DATA = {
     'saliva': {
         'cortisol': {
             'name': 'Cortisol',
@@ -99,6 +116,47 @@ TISSUE_RELEVANCE = {
     'saliva': 0.5    # Less relevant but still useful
 }
 
+
+def _build_database(data):
+    """Convert the nested dict literal into {tissue: {biomarker: MetaboliteInfo}}"""
+    return {
+        tissue_type: {name: MetaboliteInfo(**fields) for name, fields in metabolites.items()}
+        for tissue_type, metabolites in data.items()
+    }
+
+METABOLITE_DATABASE = _build_database(_METABOLITE_DATA)
+
+
+def _build_tissue_arrays(database):
+    """
+    Flatten each tissue's metabolites into parallel NumPy arrays
+    (struct-of-arrays) so scoring can index/vectorize instead of walking dicts.
+    Array position i corresponds to names[i]; idx maps name -> i.
+    """
+    tissue_arrays = {}
+    for tissue_type, metabolites in database.items():
+        names = list(metabolites)
+        normal_min = np.array([metabolites[n].normal_range[0] for n in names], dtype=np.float64)
+        normal_max = np.array([metabolites[n].normal_range[1] for n in names], dtype=np.float64)
+        tissue_arrays[tissue_type] = {
+            'names': names,
+            'idx': {name: i for i, name in enumerate(names)},
+            'min': normal_min,
+            'max': normal_max,
+            'mid': (normal_min + normal_max) / 2,
+            'half_width': (normal_max - normal_min) / 2,
+            # Validation bounds (10x below / 10x above the normal range) as
+            # plain float tuples: checked per value, where NumPy scalar
+            # indexing would cost more than it saves
+            'ext_bounds': list(zip((normal_min * 0.1).tolist(), (normal_max * 10).tolist())),
+            'importance': np.array([metabolites[n].importance for n in names], dtype=np.float64),
+            'mw': np.array([metabolites[n].molecular_weight for n in names], dtype=np.float64)
+        }
+    return tissue_arrays
+
+# Per-tissue SoA view of METABOLITE_DATABASE (built once at import)
+TISSUE_ARRAYS = _build_tissue_arrays(METABOLITE_DATABASE)
+
 def get_metabolite_info(tissue_type, biomarker_name):
     """Get metabolite information from database"""
     if tissue_type not in METABOLITE_DATABASE:
@@ -110,17 +168,17 @@ def get_metabolite_info(tissue_type, biomarker_name):
 def get_molecular_weight(tissue_type, biomarker_name):
     """Get molecular weight for a specific biomarker"""
     info = get_metabolite_info(tissue_type, biomarker_name)
-    return info['molecular_weight'] if info else None
+    return info.molecular_weight if info else None
 
 def get_normal_range(tissue_type, biomarker_name):
     """Get normal range for a specific biomarker"""
     info = get_metabolite_info(tissue_type, biomarker_name)
-    return info['normal_range'] if info else None
+    return info.normal_range if info else None
 
 def get_importance_score(tissue_type, biomarker_name):
     """Get clinical importance score for injury prediction"""
     info = get_metabolite_info(tissue_type, biomarker_name)
-    return info['importance'] if info else 0.0
+    return info.importance if info else 0.0
 
 def calculate_deviation(value, normal_range):
     """Calculate how much a value deviates from normal range (0-2 scale)"""
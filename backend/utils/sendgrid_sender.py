@@ -3,15 +3,75 @@ SendGrid email sender - Alternative to Gmail SMTP
 Easier setup, no App Passwords needed
 """
 
+import functools
 import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
-from datetime import datetime
+import threading
 
+# Same HTML body as the SMTP sender (one template for both delivery paths)
+from .email_sender import (
+    _EMAIL_TEMPLATE, _email_executor, _report_email_failure, generated_on,
+    render_html_body, template_fields
+)
 
-def send_with_sendgrid(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
-    """Send email using SendGrid API"""
+
+# SendGrid accepts at most this many personalizations per /mail/send request
+_MAX_PERSONALIZATIONS = 1000
+
+# Substitution tags for bulk sends: the body is rendered once with these
+# in place of the per-recipient values
+_SUBSTITUTION_TAGS = {
+    field: f'-{field}-'
+    for field in (
+        'recipient_name', 'risk_emoji', 'risk_score', 'risk_level', 'confidence',
+        'key_indicators', 'immediate_items', 'follow_up_items', 'monitoring_items'
+    )
+}
+
+
+# Shared API client, created on first send (see _get_client)
+_sg_client = None
+_sg_lock = threading.Lock()
+
+
+class _PooledSendGridClient:
+    """
+    SendGrid client that posts mail through a keep-alive requests.Session.
+    python_http_client (behind SendGridAPIClient) builds a new urllib opener,
+    i.e. a fresh TCP + TLS handshake, for every request; the session's
+    urllib3 pool reuses them. SendGridAPIClient still supplies the auth
+    headers and API host.
+    """
+    
+    def __init__(self, api_key):
+        # Imported here so the sendgrid/requests import cost is paid on first send
+        import requests
+        from requests.adapters import HTTPAdapter
+        from sendgrid import SendGridAPIClient
+        
+        api = SendGridAPIClient(api_key)
+        self.api_key = api.api_key
+        self.session = requests.Session()
+        self.session.headers.update(api.client.request_headers)
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=32))
+        self._send_url = f'{api.host}/v3/mail/send'
     
+    def send(self, message):
+        if not isinstance(message, dict):
+            message = message.get()
+        return self.session.post(self._send_url, json=message, timeout=30)
+
+
+def _get_client(api_key):
+    """Module-wide SendGrid client, rebuilt only if the API key changes"""
+    global _sg_client
+    with _sg_lock:
+        if _sg_client is None or _sg_client.api_key != api_key:
+            _sg_client = _PooledSendGridClient(api_key)
+        return _sg_client
+
+
+def _sender_config():
+    """(api_key, from_email, from_name) from the environment, or None if not configured"""
     SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
     FROM_EMAIL = os.getenv('SENDGRID_FROM_EMAIL', os.getenv('EMAIL_USER'))
     FROM_NAME = os.getenv('SENDGRID_FROM_NAME', 'Hamstring Injury Predictor')
@@ -19,159 +79,45 @@ def send_with_sendgrid(to_email, recipient_name, risk_score, risk_level, confide
     if not SENDGRID_API_KEY:
         print("\n⚠️  SendGrid not configured")
         print("   See backend/SENDGRID_SETUP.md for setup instructions\n")
-        return False
+        return None
     
     if not FROM_EMAIL:
         print("\n⚠️  No sender email configured (SENDGRID_FROM_EMAIL)\n")
+        return None
+    
+    return SENDGRID_API_KEY, FROM_EMAIL, FROM_NAME
+
+
+def _subject(risk_level):
+    return f'🏃 Hamstring Injury Risk Assessment - {risk_level} Risk'
+
+
+def send_with_sendgrid(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
+    """Send email using SendGrid API"""
+    
+    config = _sender_config()
+    if config is None:
         return False
+    SENDGRID_API_KEY, FROM_EMAIL, FROM_NAME = config
     
     try:
-        # Get risk emoji
-        risk_emoji = {
-            'LOW': '✅',
-            'MODERATE': '⚠️',
-            'HIGH': '🔴',
-            'CRITICAL': '🚨'
-        }.get(risk_level, '⚠️')
+        from sendgrid.helpers.mail import Mail, Email, To, Content
         
-        # Create HTML email body
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    text-align: center;
-                    border-radius: 10px 10px 0 0;
-                }}
-                .content {{
-                    background: #f9f9f9;
-                    padding: 30px;
-                    border-radius: 0 0 10px 10px;
-                }}
-                .risk-box {{
-                    background: white;
-                    padding: 20px;
-                    border-radius: 10px;
-                    margin: 20px 0;
-                    border-left: 5px solid #667eea;
-                }}
-                .risk-score {{
-                    font-size: 48px;
-                    font-weight: bold;
-                    color: #667eea;
-                    margin: 10px 0;
-                }}
-                .section {{
-                    background: white;
-                    padding: 20px;
-                    border-radius: 10px;
-                    margin: 15px 0;
-                }}
-                .section h3 {{
-                    color: #667eea;
-                    margin-top: 0;
-                }}
-                .recommendation-list {{
-                    list-style-type: none;
-                    padding-left: 0;
-                }}
-                .recommendation-list li {{
-                    padding: 8px 0;
-                    padding-left: 25px;
-                    position: relative;
-                }}
-                .recommendation-list li:before {{
-                    content: "▸";
-                    position: absolute;
-                    left: 0;
-                    color: #667eea;
-                    font-weight: bold;
-                }}
-                .footer {{
-                    text-align: center;
-                    color: #777;
-                    font-size: 12px;
-                    margin-top: 30px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🏃 Hamstring Injury Risk Assessment</h1>
-                <p>Powered by GNODE AI</p>
-            </div>
-            
-            <div class="content">
-                <p>Dear {recipient_name},</p>
-                
-                <p>Your hamstring injury risk assessment has been completed. Here are your results:</p>
-                
-                <div class="risk-box">
-                    <h2 style="margin-top: 0;">Your Risk Assessment</h2>
-                    <div class="risk-score">{risk_emoji} {risk_score}%</div>
-                    <p style="font-size: 20px; font-weight: bold; color: #333;">Risk Level: {risk_level}</p>
-                    <p style="color: #666;">Model Confidence: {confidence}%</p>
-                </div>
-                
-                <div class="section">
-                    <h3>📊 Key Indicators</h3>
-                    <p>{key_indicators}</p>
-                </div>
-                
-                <div class="section">
-                    <h3>⚠️ Immediate Actions</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['immediate'])}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h3>📅 Follow-Up (Within 3-5 Days)</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['followUp'])}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h3>📈 Ongoing Monitoring</h3>
-                    <ul class="recommendation-list">
-                        {''.join(f'<li>{item}</li>' for item in recommendations['monitoring'])}
-                    </ul>
-                </div>
-                
-                <div class="footer">
-                    <p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                    <p>© 2025 Hamstring Injury Risk Predictor | Powered by GNODE AI</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        # Fill the precompiled HTML email body
+        html_content = render_html_body(
+            recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations
+        )
         
         # Create SendGrid message
         message = Mail(
             from_email=Email(FROM_EMAIL, FROM_NAME),
             to_emails=To(to_email),
-            subject=f'🏃 Hamstring Injury Risk Assessment - {risk_level} Risk',
+            subject=_subject(risk_level),
             html_content=Content("text/html", html_content)
         )
         
         # Send email
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
+        sg = _get_client(SENDGRID_API_KEY)
         response = sg.send(message)
         
         if response.status_code in [200, 201, 202]:
@@ -185,3 +131,92 @@ def send_with_sendgrid(to_email, recipient_name, risk_score, risk_level, confide
     except Exception as e:
         print(f"❌ SendGrid error: {e}")
         return False
+
+
+def send_with_sendgrid_async(to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations):
+    """
+    Queue send_with_sendgrid on the shared background email sender and
+    return immediately, so request handlers don't wait on the SendGrid
+    round-trip.
+    
+    Returns a Future resolving to send_with_sendgrid's result
+    (asyncio callers can await asyncio.wrap_future(future))
+    """
+    future = _email_executor.submit(
+        send_with_sendgrid,
+        to_email, recipient_name, risk_score, risk_level, confidence, key_indicators, recommendations
+    )
+    future.add_done_callback(functools.partial(_report_email_failure, to_email))
+    return future
+
+
+def send_bulk_with_sendgrid(recipients):
+    """
+    Send results emails to many recipients with one SendGrid request per
+    1000 recipients (one personalization each) instead of one per email.
+    
+    recipients: list of dicts with the send_with_sendgrid keyword arguments
+    (to_email, recipient_name, risk_score, risk_level, confidence,
+    key_indicators, recommendations).
+    
+    If SENDGRID_TEMPLATE_ID is set, the body is that SendGrid dynamic
+    template, filled from each recipient's dynamic_template_data (values are
+    already HTML-escaped, so use {{{triple braces}}} in the template).
+    Otherwise the compiled HTML body is sent once per request with
+    per-recipient substitution tags.
+    
+    Returns the number of recipients SendGrid accepted.
+    """
+    config = _sender_config()
+    if config is None:
+        return 0
+    SENDGRID_API_KEY, FROM_EMAIL, FROM_NAME = config
+    TEMPLATE_ID = os.getenv('SENDGRID_TEMPLATE_ID')
+    from sendgrid.helpers.mail import Mail, Email, To, Content, Personalization, Substitution
+    
+    stamp = generated_on()
+    if not TEMPLATE_ID:
+        html_content = _EMAIL_TEMPLATE.substitute(_SUBSTITUTION_TAGS, generated_on=stamp)
+    
+    sg = _get_client(SENDGRID_API_KEY)
+    accepted = 0
+    
+    for start in range(0, len(recipients), _MAX_PERSONALIZATIONS):
+        batch = recipients[start:start + _MAX_PERSONALIZATIONS]
+        try:
+            if TEMPLATE_ID:
+                message = Mail(from_email=Email(FROM_EMAIL, FROM_NAME))
+                message.template_id = TEMPLATE_ID
+            else:
+                message = Mail(
+                    from_email=Email(FROM_EMAIL, FROM_NAME),
+                    html_content=Content("text/html", html_content)
+                )
+            
+            for recipient in batch:
+                fields = template_fields(
+                    recipient['recipient_name'], recipient['risk_score'], recipient['risk_level'],
+                    recipient['confidence'], recipient['key_indicators'], recipient['recommendations']
+                )
+                personalization = Personalization()
+                personalization.add_to(To(recipient['to_email']))
+                personalization.subject = _subject(recipient['risk_level'])
+                if TEMPLATE_ID:
+                    personalization.dynamic_template_data = {**fields, 'generated_on': stamp}
+                else:
+                    for field, tag in _SUBSTITUTION_TAGS.items():
+                        personalization.add_substitution(Substitution(tag, fields[field]))
+                message.add_personalization(personalization)
+            
+            response = sg.send(message)
+            
+            if response.status_code in [200, 201, 202]:
+                accepted += len(batch)
+            else:
+                print(f"❌ SendGrid returned status code: {response.status_code}")
+                
+        except Exception as e:
+            print(f"❌ SendGrid error: {e}")
+    
+    print(f"✅ SendGrid accepted {accepted}/{len(recipients)} bulk emails")
+    return accepted